@@ -1,7 +1,24 @@
+import functools
+import importlib
+import re
+import threading
+
 import streamlit as st
 
-# --- Custom CSS for a modern SaaS feel ---
-st.markdown("""
+# --- PAGE CONFIGURATION ---
+# One-shot initializer: only needed on the first run of the session.
+if not st.session_state.get("_page_cfg_done"):
+    st.set_page_config(
+        page_title="IntrinsicAlpha AI",
+        page_icon="📈",
+        layout="wide"
+    )
+    st.session_state["_page_cfg_done"] = True
+
+# --- STATIC ASSETS ---
+# Kept at module level so the literals are built once per process instead of
+# on every rerun.
+_CSS = """
 <style>
     .hero-section {
         padding: 6rem 2rem;
@@ -14,7 +31,6 @@ st.markdown("""
         font-size: 3.5rem;
         font-weight: 700;
         line-height: 1.2;
-        color: #1a1a1a;
     }
     .hero-section p {
         font-size: 1.5rem;
@@ -29,100 +45,145 @@ st.markdown("""
         margin-top: 2rem;
     }
     .feature-card {
-        background: #fff;
         padding: 2rem;
         border-radius: 10px;
         box-shadow: 0 4px 6px rgba(0, 0, 0, 0.08);
         text-align: center;
         border: 1px solid #e2e8f0;
-        transition: transform 0.2s;
     }
-    .feature-card:hover {
-        transform: translateY(-5px);
+    /* Only animate the cards for users who allow motion; the baseline rule
+       carries no transition, so the initial paint needs no extra layers. */
+    @media (prefers-reduced-motion: no-preference) {
+        .feature-card {
+            transition: transform 0.2s;
+        }
+        .feature-card:hover {
+            transform: translateY(-5px);
+            will-change: transform;
+        }
+    }
+    /* The CTAs are page links; style them as primary buttons */
+    [class*="st-key-cta_"] [data-testid="stPageLink-NavLink"] {
+        background: #ff4b4b;
+        border-radius: 0.5rem;
+        padding: 0.6rem 1.5rem;
+    }
+    [class*="st-key-cta_"] [data-testid="stPageLink-NavLink"]:hover {
+        background: #ff2b2b;
+    }
+    [class*="st-key-cta_"] [data-testid="stPageLink-NavLink"] * {
+        color: #ffffff;
+        font-weight: 600;
+    }
+    .section-divider {
+        margin: 2rem 0;
+        border: none;
+        border-top: 1px solid #e2e8f0;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+
+def _hero(heading, tag, text):
+    """Builds a hero-section block; shared by the top hero and the final CTA."""
+    return f'<div class="hero-section"><{tag}>{heading}</{tag}><p>{text}</p></div>'
+
+_HERO_HTML = _hero(
+    "IntrinsicAlpha AI: The New Standard for Value Investing",
+    "h1",
+    "Stop overpaying for stocks! This isn't just another finance app; it's your personal AI co-pilot, designed to help you find undervalued gems. We combine the wisdom of Graham and Buffett with the power of modern AI, and our mission is to make you a more confident, data-driven investor.",
+)
+
+FEATURES = [
+    ("Explainable AI & Transparent Reasoning", "You don't just get a buy/sell signal; you see exactly why. Our dashboards visualize key factors and simplify the complex logic, so you can learn and build conviction with every analysis."),
+    ("Grounded in Timeless Principles", "Our AI agents are embedded with the philosophies of Benjamin Graham and Warren Buffett to find companies with a significant margin of safety and a durable business moat."),
+    ("Actionable, Portfolio-Aware Guidance", 'We go beyond basic analysis to provide practical advice, helping you answer the most critical questions: "Is this a good fit for my portfolio?" and "How much should I invest?"'),
+    ("An Agentic AI Crew", "Powered by a modular, multi-agent system, our AI can handle a multi-step analysis just like a human investor. It can pull qualitative and quantitative signals and monitor its own performance."),
+]
+
+@functools.lru_cache(maxsize=1)
+def _features_html():
+    """Builds the feature grid from FEATURES."""
+    cards = "".join(f'<div class="feature-card"><h3>{title}</h3><p>{body}</p></div>' for title, body in FEATURES)
+    # The grid wrapper has to live in the same element as the cards,
+    # otherwise Streamlit closes the div before the cards are rendered.
+    # The section dividers ship with the grid instead of as st.divider() calls.
+    return (
+        '<hr class="section-divider">'
+        f'<h2>Why IntrinsicAlpha AI Stands Out?</h2><div class="feature-grid">{cards}</div>'
+        '<hr class="section-divider">'
+    )
+
+_CTA_HTML = _hero(
+    "Ready to Invest with Conviction?",
+    "h2",
+    "Stop overpaying for stocks. Let our AI help you find great companies at wonderful prices.",
+)
+
+def _compact(markup):
+    """Collapses insignificant whitespace so less markup is sent to the browser."""
+    return re.sub(r">\s+<", "><", re.sub(r"\s+", " ", markup)).strip()
+
+# Static blocks, shipped as raw prerendered HTML with st.html so none of
+# them goes through the markdown parser or the unsafe_allow_html sanitizer.
+# The stylesheet travels with the hero: a style-only st.html lands in
+# Streamlit's event container, which cached elements cannot be replayed into.
+_STATIC_BLOCKS = {
+    "hero": _CSS + _HERO_HTML,
+    "features": _features_html(),
+    "cta": _CTA_HTML,
+}
+
+# Bump whenever a static block changes so a long-running server drops its
+# cached copy.
+_ASSETS_VERSION = "v6"
+
+@st.cache_resource
+def render_static(name, version=_ASSETS_VERSION):
+    """Renders a static landing page block once per process; cache hits replay it."""
+    st.html(_compact(_STATIC_BLOCKS[name]))
+    return object()
+
+# Heavy libraries imported by pages/1_Stock_Insight.py. Importing the page
+# itself would execute it, so only its dependencies are warmed.
+_STOCK_INSIGHT_DEPENDENCIES = ("pandas", "numpy", "plotly.graph_objects", "yfinance")
+
+@st.cache_resource
+def _prewarm_stock_insight():
+    """Imports the Stock Insight dependencies in the background, once per process."""
+    def load():
+        for name in _STOCK_INSIGHT_DEPENDENCIES:
+            importlib.import_module(name)
+
+    thread = threading.Thread(target=load, name="prewarm-stock-insight", daemon=True)
+    thread.start()
+    return thread
+
+def cta(label, key):
+    """Renders a centered call-to-action link to the Stock Insight page."""
+    # A page link navigates from the browser, so a click no longer reruns
+    # this script just to call st.switch_page. The key gives the container
+    # the st-key-cta_* class that the CSS styles as a primary button.
+    with st.container(horizontal=True, horizontal_alignment="center", key=key):
+        st.page_link("pages/1_Stock_Insight.py", label=label)
+
+# Move the Stock Insight import cost off the CTA click path.
+_prewarm_stock_insight()
 
-# --- HERO SECTION ---
+# --- HERO SECTION (with custom CSS for a modern SaaS feel) ---
 with st.container():
-    st.markdown("""
-    <div class="hero-section">
-        <h1>IntrinsicAlpha AI: The New Standard for Value Investing</h1>
-        <p>Stop overpaying for stocks! This isn't just another finance app; it's your personal AI co-pilot, designed to help you find undervalued gems. We combine the wisdom of Graham and Buffett with the power of modern AI, and our mission is to make you a more confident, data-driven investor.</p>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    col1, col2, col3 = st.columns([1,1,1])
-    with col2:
-        if st.button("🚀 Start Analyzing", use_container_width=True, type="primary"):
-            st.switch_page("pages/1_Stock_Insight.py")
-
-st.divider()
+    render_static("hero")
+    cta("🚀 Start Analyzing", "cta_top")
 
 # --- CORE FEATURES SECTION ---
 with st.container():
-    st.header("Why IntrinsicAlpha AI Stands Out?")
-    st.markdown('<div class="feature-grid">', unsafe_allow_html=True)
-    
-    # Feature 1: Explainable AI
-    st.markdown("""
-    <div class="feature-card">
-        <h3>Explainable AI & Transparent Reasoning</h3>
-        <p>You don't just get a buy/sell signal; you see exactly why. Our dashboards visualize key factors and simplify the complex logic, so you can learn and build conviction with every analysis.</p>
-    </div>
-    """, unsafe_allow_html=True)
-
-    # Feature 2: Grounded in Timeless Principles
-    st.markdown("""
-    <div class="feature-card">
-        <h3>Grounded in Timeless Principles</h3>
-        <p>Our AI agents are embedded with the philosophies of Benjamin Graham and Warren Buffett to find companies with a significant margin of safety and a durable business moat.</p>
-    </div>
-    """, unsafe_allow_html=True)
-
-    # Feature 3: Actionable, Portfolio-Aware Guidance
-    st.markdown("""
-    <div class="feature-card">
-        <h3>Actionable, Portfolio-Aware Guidance</h3>
-        <p>We go beyond basic analysis to provide practical advice, helping you answer the most critical questions: "Is this a good fit for my portfolio?" and "How much should I invest?"</p>
-    </div>
-    """, unsafe_allow_html=True)
-
-    # Feature 4: An Agentic AI Crew
-    st.markdown("""
-    <div class="feature-card">
-        <h3>An Agentic AI Crew</h3>
-        <p>Powered by a modular, multi-agent system, our AI can handle a multi-step analysis just like a human investor. It can pull qualitative and quantitative signals and monitor its own performance.</p>
-    </div>
-    """, unsafe_allow_html=True)
-
-    st.markdown('</div>', unsafe_allow_html=True)
-
-st.divider()
+    render_static("features")
 
 # --- FINAL CTA SECTION ---
 with st.container():
-    st.markdown("""
-    <div class="hero-section">
-        <h2>Ready to Invest with Conviction?</h2>
-        <p>Stop overpaying for stocks. Let our AI help you find great companies at wonderful prices.</p>
-    </div>
-    """, unsafe_allow_html=True)
-    
-    col1, col2, col3 = st.columns([1,1,1])
-    with col2:
-        if st.button("🚀 Get Started Now", use_container_width=True, type="primary"):
-            st.switch_page("pages/1_Stock_Insight.py")
+    render_static("cta")
+    cta("🚀 Get Started Now", "cta_bot")
 
 # --- FOOTER ---
-st.markdown("""
-<br>
-<div style="text-align: center; color: #718096;">
-    <p>Disclaimer: This is a prototype and not financial advice. All data is for illustrative purposes only.</p>
-    <p>
-        <a href="https://github.com/your-username/your-repo" target="_blank">
-            <img src="https://img.shields.io/badge/GitHub-100000?style=for-the-badge&logo=github&logoColor=white" alt="GitHub Badge" />
-        </a>
-    </p>
-</div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+with st.container(horizontal_alignment="center"):
+    st.caption("Disclaimer: This is a prototype and not financial advice. All data is for illustrative purposes only.", width="content")
+    st.link_button("GitHub", "https://github.com/your-username/your-repo")
@@ -1,14 +1,12 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import matplotlib.pyplot as plt
-import yfinance as yf
-import time
-import datetime
-import plotly.graph_objects as go
-import math
-import uuid
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from tools.cache import default_cache, file_cached
+from tools.sidebar import chat_history
+from tools.yahoo import throttled
 
 # --- PAGE CONFIGURATION ---
 st.set_page_config(
@@ -17,122 +15,275 @@ st.set_page_config(
     layout="wide"
 )
 
-# --- SESSION STATE INITIALIZATION ---
-if "sessions" not in st.session_state:
-    st.session_state.sessions = {}
-if "current_session_id" not in st.session_state:
-    st.session_state.current_session_id = None
-if "editing_session_id" not in st.session_state:
-    st.session_state.editing_session_id = None
-
-# Pre-populate dummy data for demonstration
-if not st.session_state.sessions:
-    st.session_state.sessions = {
-        str(uuid.uuid4()): {"title": "Is GOOG a Growth Stock?"},
-        str(uuid.uuid4()): {"title": "PEG Ratio Explained"},
-        str(uuid.uuid4()): {"title": "Comparing KO and PEP"},
-        str(uuid.uuid4()): {"title": "MSFT Intrinsic Value Analysis"} 
+# Page-wide style overrides, sent as a single block on each run. A style-only
+# st.html goes to Streamlit's event container, so it takes no layout space.
+PAGE_CSS = """
+<style>
+    /* Compact timeframe radio buttons */
+    div[data-testid="stRadio"] label {
+        padding-top: 0px !important;
+        padding-bottom: 0px !important;
+        margin-top: -35px !important;
+    }
+
+    /* Tighter metric cards with smaller fonts to prevent truncation */
+    div[data-testid="stMetric"] {
+        padding: 0.5rem;
     }
-    st.session_state.current_session_id = None
-
-# The updated function now also clears the ticker input value.
-def new_chat_session():
-    """Creates a new chat session and clears the ticker input."""
-    session_id = str(uuid.uuid4())
-    st.session_state.current_session_id = session_id
-    st.session_state.sessions[session_id] = {"title": "New Chat"}
-    st.session_state.editing_session_id = None
-    # Crucial line: Reset the ticker input widget value in session state
-    st.session_state.stock_ticker_input = ""
+    div[data-testid="stMetricLabel"] p {
+        font-size: 0.9rem !important;
+    }
+    div[data-testid="stMetricValue"] {
+        font-size: 1.5rem !important;
+    }
+</style>
+"""
+st.html(PAGE_CSS)
 
 # --- SIDEBAR: CHAT HISTORY ---
 with st.sidebar:
-    st.header("IntrinsicAlpha AI")
-    # Call the new function directly when the button is clicked
-    if st.button("New chat", use_container_width=True):
-        new_chat_session()
-        st.rerun()
-
-    st.markdown("---")
-    st.subheader("Recent")
-
-    if st.session_state.sessions:
-        for session_id, session_data in reversed(list(st.session_state.sessions.items())):
-            is_active = (session_id == st.session_state.current_session_id)
-            label = f"**▶ {session_data['title']}**" if is_active else session_data['title']
-
-            # Create a horizontal layout with three columns
-            col1, col2, col3 = st.columns([0.7, 0.15, 0.15])
-
-            with col1:
-                if st.button(label, key=f"load_{session_id}", use_container_width=True):
-                    st.session_state.current_session_id = session_id
-                    st.session_state.editing_session_id = None
-                    st.rerun()
-
-            with col2.container(border=False):
-                if st.button("✏️", key=f"start_edit_{session_id}", use_container_width=True):
-                    st.session_state.editing_session_id = session_id
-                    st.rerun()
-
-            with col3.container(border=False):
-                if st.button("🗑️", key=f"delete_{session_id}", use_container_width=True):
-                    del st.session_state.sessions[session_id]
-                    if st.session_state.current_session_id == session_id:
-                        st.session_state.current_session_id = None
-                    st.rerun()
-
-            # Handle the rename functionality
-            if st.session_state.editing_session_id == session_id:
-                new_title = st.text_input("New title", value=session_data["title"], key=f"edit_{session_id}", label_visibility="collapsed")
-                if new_title and new_title != session_data["title"]:
-                    st.session_state.sessions[session_id]["title"] = new_title
-                    st.session_state.editing_session_id = None
-                    st.rerun()
-
+    # Starting a new chat also clears the ticker input
+    chat_history(clear_keys=("stock_ticker_input",))
     st.markdown("---")
 
 # --- HELPER FUNCTIONS ---
+# Suffixes for large numbers, largest scale first
+_LARGE_NUMBER_SCALES = ((1e12, 'T'), (1e9, 'B'))
+
 def format_large_number(num):
     """
     Formats a large number with a T (trillion) or B (billion) suffix.
+    Also accepts an array or Series and formats every element in one pass.
     """
-    if num is None or not isinstance(num, (int, float)):
-        return 'N/A'
-    if num >= 1e12:
-        return f"{num / 1e12:.2f}T"
-    elif num >= 1e9:
-        return f"{num / 1e9:.2f}B"
-    else:
+    if np.ndim(num) == 0:
+        # Single values skip the array machinery entirely
+        if num is None or not isinstance(num, (int, float, np.number)) or num != num:
+            return 'N/A'
+        for scale, suffix in _LARGE_NUMBER_SCALES:
+            if num >= scale:
+                return f"{num / scale:.2f}{suffix}"
         return f"{num:,.0f}"
 
-def get_stock_data(ticker, timeframe='1y'):
-    """Fetches real historical stock data using yfinance."""
-    valid_periods = {'1D': '1d', '5D': '5d', '1M': '1mo', '6M': '6mo', 'YTD': 'ytd', '1Y': '1y', '5Y': '5y', 'MAX': 'max'}
-    period = valid_periods.get(timeframe, '1y')
-    
-    if timeframe in ('1D', '5D'):
-        interval = '1m'
+    values = np.asarray(num, dtype=float)
+    magnitude = [values >= scale for scale, _ in _LARGE_NUMBER_SCALES]
+    scaled = values / np.select(magnitude, [scale for scale, _ in _LARGE_NUMBER_SCALES], 1.0)
+    suffixes = np.select(magnitude, [suffix for _, suffix in _LARGE_NUMBER_SCALES], '')
+
+    return [
+        'N/A' if np.isnan(v) else f"{v:.2f}{suffix}" if suffix else f"{v:,.0f}"
+        for v, suffix in zip(scaled, suffixes)
+    ]
+
+def format_metric(m, value):
+    """Formats a metric's value for display, applying its spec's format and suffix."""
+    value_to_display = value
+    if 'format_func' in m:
+        value_to_display = m['format_func'](value_to_display)
+    elif m.get('format') and value_to_display is not None:
+        value_to_display = f"{value_to_display:{m['format']}}"
     else:
-        interval = '1d'
-
-    data = yf.download(ticker, period=period, interval=interval, progress=False)
+        value_to_display = str(value_to_display)
+
+    if 'suffix' in m and value_to_display != 'N/A':
+        value_to_display += m['suffix']
+    return value_to_display
+
+# Key metrics shown on the page, in display order. Each value is read from
+# the live metrics ("metrics") or the historical metrics ("hist") by key.
+KEY_METRIC_SPECS = [
+    {"label": "Previous Close", "source": "metrics", "key": 'Previous Close', "help": "The closing price of the stock on the previous trading day.", "format": ".2f"},
+    {"label": "Open", "source": "metrics", "key": 'Open', "help": "The price at which the stock began trading at the start of the current trading day.", "format": ".2f"},
+    {"label": "Day's Range", "source": "metrics", "key": "Day's Range", "help": "The range between the highest and lowest prices at which a stock has traded during the current day."},
+    {"label": "Volume", "source": "metrics", "key": 'Volume', "help": "The total number of shares of a security that have been traded during a given period. High volume can indicate strong investor interest.", "format_func": format_large_number},
+    {"label": "Market Cap", "source": "metrics", "key": 'Market Cap', "help": "The total value of a company’s outstanding shares. Used to determine a company's size and compare it to others.", "format_func": format_large_number},
+    {"label": "P/B Ratio", "source": "metrics", "key": 'P/B Ratio', "help": "The P/B (Price-to-Book) ratio compares a stock's price to the company's net asset value. For a value investor, a P/B ratio under 1 is a traditional signal of an undervalued stock. Apple's P/B of ~58 is exceptionally high, reflecting strong market confidence in its intangible assets like brand and ecosystem, rather than its book value. This is significantly above its own 5-year average of ~29 and the technology industry average of ~13. This indicates the market is placing a very high value on the company's intangible assets, like its brand and ecosystem, rather than its tangible balance sheet. This is a crucial distinction from traditional value investing.", "format": ".2f"},
+    {"label": "Debt-to-Equity Ratio", "source": "metrics", "key": 'Debt-to-Equity Ratio', "help": "This ratio indicates a company's financial leverage. A low ratio (under 1.5) is a sign of a financially strong company, which is crucial for stability. Apple's ratio of ~154 is high, suggesting a significant amount of debt, which should be considered when assessing risk.", "format": ".2f"},
+    {"label": "P/E Ratio (TTM)", "source": "metrics", "key": 'PE Ratio (TTM)', "help": "The P/E Ratio (Price-to-Earnings) is a key valuation metric. For a defensive investor, Benjamin Graham suggested a P/E of less than 15. Apple's P/E of ~38.89 is significantly above this historical benchmark, suggesting the market expects substantial future growth. For an investor focused on a significant margin of safety, this metric is a warning sign that the stock may be overvalued.", "format": ".2f"},
+    {"label": "P/E Historical Avg (5Y)", "source": "hist", "key": 'Historical PE Avg (5Y)', "help": "This compares the current P/E to its 5-year historical average (~29). A P/E of ~38.89 is significantly higher, indicating the stock is valued above its own recent history and suggests strong market optimism about future growth.", "format": ".2f"},
+    {"label": "EPS (TTM)", "source": "metrics", "key": 'EPS (TTM)', "help": "Earnings Per Share (TTM) is the company's profit allocated to each outstanding share. Consistent EPS growth is a hallmark of a high-quality, predictable business. There is no single 'good' EPS number; it's a metric of a company's profitability. A large, stable EPS like Apple's (~$6.59) is a key factor in calculating a company's intrinsic value and is a sign of a strong business.", "format": ".2f"},
+    {"label": "Avg. Volume", "source": "metrics", "key": 'Avg. Volume', "help": "The average daily trading volume over a specified period. High volume can indicate strong investor interest.", "format_func": format_large_number},
+    {"label": "Current ROA", "source": "hist", "key": 'Current ROA', "help": "Return on Assets (ROA) measures how efficiently a company uses its assets to generate earnings. A good ROA depends on the industry, but generally, a number over 20% is considered excellent. Apple's ROA of ~22.1% is not only a testament to its operational efficiency but is also significantly higher than the technology industry average of ~12%, indicating a strong competitive advantage and high-quality business model. This is a key metric for a value investor assessing a company with a strong 'moat.'", "format": ".1f", "suffix": "%"},
+    {"label": "Historical ROA Avg (5Y)", "source": "hist", "key": 'Historical ROA Avg (5Y)', "help": "Historical Return on Assets shows how a company's efficiency has changed over time. Apple's current ROA (~22.1%) is higher than its historical average (~18.5%), indicating that the company's capital efficiency has improved.", "format": ".1f", "suffix": "%"},
+    {"label": "Current Div Yield", "source": "metrics", "key": 'Current Dividend Yield', "help": "The dividend yield shows the return on your investment from dividends alone. Apple’s current yield of ~0.41% is low compared to the S&P 500 average of around 1.5–2% and even slightly below the tech sector average of ~0.5–1%. This is typical for a growth-oriented company that reinvests its profits into innovation rather than paying large dividends.", "format": ".2f", "suffix": "%"},
+    {"label": "Historical Div Yield Avg (5Y)", "source": "hist", "key": 'Historical Dividend Yield Avg (5Y)', "help": "The average dividend yield over the last 5 years is ~0.52%. Apple’s current yield of ~0.41% is slightly below this historical average, which mainly reflects its rising stock price rather than a shift in dividend policy. For a stable payer like Apple, changes in yield usually signal price movement, not a change in fundamentals.", "format": ".2f", "suffix": "%"}
+]
+
+# Column each metric lands in, splitting them evenly across three columns
+_METRIC_GROUPS = np.array_split(np.arange(len(KEY_METRIC_SPECS)), 3)
+
+# How long price history stays fresh. Minute bars go stale almost at once,
+# while the daily series only gains a bar per trading day.
+INTRADAY_TTL = 60
+DAILY_TTL = 60 * 60
+
+# TTLs only bound how old cached prices get, so the number of tickers kept
+# in memory is capped too; the least recently used ones are dropped first
+PRICE_CACHE_TICKERS = 64
+
+# Timeframes offered above the price chart
+TIMEFRAMES = ('1D', '5D', '1M', '6M', 'YTD', '1Y', '5Y', 'MAX')
+
+# Daily timeframes are sliced out of the full daily history
+_DAILY_LOOKBACKS = {'1M': pd.DateOffset(months=1), '6M': pd.DateOffset(months=6), '1Y': pd.DateOffset(years=1), '5Y': pd.DateOffset(years=5)}
+
+def download_history(ticker, period, interval):
+    """Downloads OHLCV history for a stock using yfinance."""
+    data = throttled(
+        (ticker, 'history', period, interval),
+        lambda: yf.download(ticker, period=period, interval=interval, progress=False)
+    )
     
     if data.empty:
         return pd.DataFrame()
 
-    data.columns = [col[0] if isinstance(col, tuple) else col for col in data.columns]
+    # yfinance labels columns (Price, Ticker) even for a single ticker. The
+    # frame may be shared with other waiters in throttled(), so it is never
+    # modified in place.
+    if isinstance(data.columns, pd.MultiIndex):
+        data = data.droplevel(1, axis=1)
     
-    df = pd.DataFrame(data[['Open', 'High', 'Low', 'Close', 'Volume']])
+    # Prices stay float64, since float32 cannot hold cents above ~$131k
+    # (e.g. BRK-A); Volume stays int64, since split-adjusted volumes can
+    # exceed the int32 range.
+    df = data[['Open', 'High', 'Low', 'Close', 'Volume']]
     df.index = df.index.tz_localize(None)
     
     return df
 
-@st.cache_data
+@st.cache_data(ttl=DAILY_TTL, max_entries=PRICE_CACHE_TICKERS)
+@file_cached(endpoint='daily_history', ttl_seconds=DAILY_TTL)
+def get_daily_full(ticker):
+    """Fetches the full daily price history for a stock."""
+    return download_history(ticker, 'max', '1d')
+
+@st.cache_data(ttl=INTRADAY_TTL, max_entries=PRICE_CACHE_TICKERS)
+def get_intraday(ticker):
+    """Fetches the last five trading days of one-minute bars for a stock."""
+    return download_history(ticker, '5d', '1m')
+
+def get_stock_data(ticker, timeframe='1Y'):
+    """
+    Returns the price history for a timeframe. Every timeframe is cut from
+    one of two cached series, so switching between them never goes back
+    to Yahoo.
+    """
+    df = get_intraday(ticker) if timeframe in ('1D', '5D') else get_daily_full(ticker)
+    if df.empty or timeframe in ('5D', 'MAX'):
+        return df
+
+    last_day = df.index[-1].normalize()
+    if timeframe == '1D':
+        start = last_day
+    elif timeframe == 'YTD':
+        start = pd.Timestamp(year=last_day.year, month=1, day=1)
+    else:
+        start = last_day - _DAILY_LOOKBACKS.get(timeframe, _DAILY_LOOKBACKS['1Y'])
+    # The index is sorted, so a binary search finds the cut without a mask
+    return df.iloc[df.index.searchsorted(start):]
+
+@st.cache_data(ttl=INTRADAY_TTL, max_entries=PRICE_CACHE_TICKERS * len(TIMEFRAMES))
+def get_price_change(ticker, timeframe):
+    """Returns the latest price and its change over a timeframe, in USD and percent."""
+    stock_data_tf = get_stock_data(ticker, timeframe)
+    if stock_data_tf.empty:
+        return 0, 0, 0
+
+    close = stock_data_tf['Close'].to_numpy()
+    start_price, end_price = close[0], close[-1]
+    price_change = end_price - start_price
+    percent_change = (price_change / start_price) * 100
+    return end_price, price_change, percent_change
+
+# Most points drawn on the price chart; longer series are thinned to fit
+MAX_CHART_POINTS = 2000
+
+def downsample(df, max_points=MAX_CHART_POINTS):
+    """Thins a price series to about max_points evenly spaced rows, always keeping the latest one."""
+    if len(df) <= max_points:
+        return df
+    step = -(-len(df) // max_points)
+    return df.iloc[np.r_[np.arange(0, len(df) - 1, step), len(df) - 1]]
+
+@st.cache_resource(ttl=INTRADAY_TTL, max_entries=PRICE_CACHE_TICKERS * len(TIMEFRAMES))
+def build_price_figure(ticker, timeframe):
+    """
+    Builds the price chart for a timeframe. Reruns share the cached figure
+    instead of unpickling a copy, so callers must not modify it.
+    """
+    stock_data_tf = downsample(get_stock_data(ticker, timeframe))
+    _, price_change, _ = get_price_change(ticker, timeframe)
+    color = "#00b050" if price_change >= 0 else "#ff4d4d"
+
+    fig = go.Figure(data=go.Scatter(
+        x=stock_data_tf.index,
+        y=stock_data_tf['Close'],
+        mode='lines',
+        line=dict(color=color),
+        hovertemplate=(
+            "<b>Date:</b> %{x|%Y-%m-%d %H:%M}<br>" +
+            "<b>Close:</b> %{y:.2f}<br>" +
+            "<b>Open:</b> %{customdata[0]:.2f}<br>" +
+            "<b>High:</b> %{customdata[1]:.2f}<br>" +
+            "<b>Low:</b> %{customdata[2]:.2f}<br>" +
+            "<b>Volume:</b> %{customdata[3]:,}<extra></extra>"
+        ),
+        customdata=stock_data_tf[['Open', 'High', 'Low', 'Volume']].to_numpy()
+    ))
+
+    fig.update_layout(
+        height=400,
+        margin=dict(t=10, b=10, l=10, r=10),
+        xaxis_title='',
+        yaxis_title='Stock Price',
+        xaxis_rangeslider_visible=False
+    )
+    return fig
+
+# How long fetched data stays fresh. Quotes in .info move all day, while
+# annual statements and share counts change a few times a year at most.
+INFO_TTL = 60 * 60
+STATEMENT_TTL = 7 * 24 * 60 * 60
+
+# Ticker attributes fetched together by fetch_bundle, with their on-disk TTL
+_BUNDLE_ATTRIBUTES = {
+    'info': (lambda ticker_obj: ticker_obj.info, INFO_TTL),
+    'income_stmt': (lambda ticker_obj: ticker_obj.income_stmt, STATEMENT_TTL),
+    'balance_sheet': (lambda ticker_obj: ticker_obj.balance_sheet, STATEMENT_TTL),
+    'cash_flow': (lambda ticker_obj: ticker_obj.cash_flow, STATEMENT_TTL),
+    'shares': (lambda ticker_obj: ticker_obj.get_shares_full(), STATEMENT_TTL),
+}
+
+def _download_attribute(ticker_obj, name):
+    """Fetches a single Ticker attribute, returning None if it is unavailable."""
+    fetch, ttl = _BUNDLE_ATTRIBUTES[name]
+    try:
+        return default_cache.get_or_fetch(
+            ticker_obj.ticker, name,
+            lambda: throttled((ticker_obj.ticker, name), lambda: fetch(ticker_obj)),
+            ttl
+        )
+    except Exception as e:
+        print(f"Could not fetch {name} for {ticker_obj.ticker}. Error: {e}")
+        return None
+
+@st.cache_data(ttl=INFO_TTL, show_spinner=False)
+def fetch_bundle(ticker):
+    """
+    Fetches every per-ticker yfinance endpoint the page needs in one go.
+    The requests are network-bound, so they run concurrently instead of one
+    after another. Each attribute is kept on disk for its own TTL.
+    """
+    # A Ticker memoizes everything it fetches, so a fresh one is built on
+    # each cache miss; a shared one would hand back the first quote forever.
+    ticker_obj = yf.Ticker(ticker)
+    with ThreadPoolExecutor(max_workers=len(_BUNDLE_ATTRIBUTES)) as executor:
+        futures = {executor.submit(_download_attribute, ticker_obj, name): name for name in _BUNDLE_ATTRIBUTES}
+        return {futures[future]: future.result() for future in as_completed(futures)}
+
+@st.cache_data(ttl=INFO_TTL, show_spinner=False)
 def get_key_metrics(ticker):
     """Fetches key metrics for a stock."""
-    ticker_obj = yf.Ticker(ticker)
-    info = ticker_obj.info
+    info = fetch_bundle(ticker)['info']
     
     if not info:
         return None
@@ -176,9 +327,9 @@ def generate_valuation_data():
         'Margin of Safety (%)': 15.65
     }
 
-@st.cache_data
 def generate_feature_importance_data():
     """Generates mock feature importance data."""
+    # Listed from most to least important; keep it that way when editing
     data = {
         'Feature': [
             'Durable Business Moat', 'Earnings Power & Stability', 
@@ -187,19 +338,19 @@ def generate_feature_importance_data():
         ],
         'Importance': [0.40, 0.25, 0.15, 0.10, 0.10],
     }
-    df = pd.DataFrame(data).sort_values('Importance', ascending=False)
-    return df
+    return pd.DataFrame(data)
 
-@st.cache_data
+@st.cache_data(ttl=STATEMENT_TTL, show_spinner=False)
 def get_historical_financials(ticker):
     """Fetches all available historical financials."""
-    ticker_obj = yf.Ticker(ticker)
+    bundle = fetch_bundle(ticker)
 
     try:
-        # Get all available annual financials
-        income_statement = ticker_obj.income_stmt
-        balance_sheet = ticker_obj.balance_sheet
-        cash_flow = ticker_obj.cash_flow
+        # Get all available annual financials, oldest year first. Sorting each
+        # statement once keeps every series below in date order for plotting.
+        income_statement = bundle['income_stmt'].sort_index(axis=1)
+        balance_sheet = bundle['balance_sheet'].sort_index(axis=1)
+        cash_flow = bundle['cash_flow'].sort_index(axis=1)
 
         # Pull key metrics from the fetched data
         # No slicing here, so we get all available data
@@ -211,32 +362,28 @@ def get_historical_financials(ticker):
         capital_expenditures = cash_flow.loc['Capital Expenditure']
 
         # Calculate Free Cash Flow (FCF)
-        fcf = operating_cash_flow.values - np.abs(capital_expenditures.values)
-        fcf = pd.Series(fcf, index=operating_cash_flow.index)
+        fcf = operating_cash_flow.sub(capital_expenditures.abs())
 
         # Metrics
         total_liabilities = balance_sheet.loc['Total Liabilities Net Minority Interest']
         total_equity = balance_sheet.loc['Stockholders Equity']
-        debt_to_equity = total_liabilities.values / total_equity.values
-        debt_to_equity = pd.Series(debt_to_equity, index=total_equity.index)
+        debt_to_equity = total_liabilities.div(total_equity)
 
         # Calculate ROE
-        roe = net_income.values / total_equity.values
-        roe = pd.Series(roe, index=total_equity.index)
+        roe = net_income.div(total_equity)
 
-        # Sort all series by date to ensure they are in the correct order for plotting
         return {
-            'revenue': revenue.sort_index(),
-            'net_income': net_income.sort_index(),
-            'fcf': fcf.sort_index(),
-            'debt_to_equity': debt_to_equity.sort_index(),
-            'roe': roe.sort_index()
+            'revenue': revenue,
+            'net_income': net_income,
+            'fcf': fcf,
+            'debt_to_equity': debt_to_equity,
+            'roe': roe
         }
     except Exception as e:
         print(f"Could not fetch detailed financial data for {ticker.upper()}. Error: {e}")
         return None
 
-@st.cache_data
+@st.cache_data(show_spinner=False)
 def get_moat_and_management_rating(ticker):
     """Generates mock qualitative ratings."""
     return {
@@ -250,6 +397,42 @@ def get_moat_and_management_rating(ticker):
         }
     }
 
+# Detailed moat and management write-ups, keyed by ticker
+_QUALITATIVE_INSIGHTS = {
+    "AAPL": {
+        "moat": {
+            "rating": "Very Wide Moat",
+            "types": [
+                {"name": "Network Effects", "icon": "🌐"},
+                {"name": "High Switching Costs", "icon": "🔗"},
+                {"name": "Intangible Assets (Brand)", "icon": "👑"}
+            ],
+            "explanation": "Powered by a deeply integrated ecosystem of hardware, software, and services. The **Network Effect** is at play as more users on the platform attract more developers and services. This creates **High Switching Costs**, as users are reluctant to leave the familiar ecosystem and abandon their app purchases, media library, and data. The **Intangible Asset** of its powerful brand allows it to command premium pricing."
+        },
+        "management": {
+            "rating": "Exceptional",
+            "explanation": "Management has a proven track record of efficient **capital allocation**, evidenced by consistent, disciplined share buybacks that have reduced the share count over time. Their focus on **innovation and margin control** has allowed the company to generate strong, predictable earnings and free cash flow."
+        }
+    }
+}
+
+# Placeholder for tickers without a write-up yet
+_DEFAULT_QUALITATIVE_INSIGHTS = {
+    "moat": {
+        "rating": "No Moat",
+        "types": [],
+        "explanation": "Moat analysis is not available for this ticker yet. The AI is constantly learning and adding more detailed insights."
+    },
+    "management": {
+        "rating": "N/A",
+        "explanation": "Management analysis is not yet available for this ticker."
+    }
+}
+
+def get_detailed_qualitative_insights(ticker):
+    """Returns the detailed moat and management insights for a ticker."""
+    return _QUALITATIVE_INSIGHTS.get(ticker.upper(), _DEFAULT_QUALITATIVE_INSIGHTS)
+
 @st.cache_data
 def get_similar_stocks(ticker):
     """Returns mock data for similar stocks."""
@@ -258,21 +441,20 @@ def get_similar_stocks(ticker):
     return ['MSFT', 'GOOG', 'NVDA']
 
 # --- DCF Calculation Helper Functions ---
-@st.cache_data
+@st.cache_data(ttl=STATEMENT_TTL, show_spinner=False)
 def get_dcf_base_data(ticker):
     """Fetches the last reported Free Cash Flow and Shares Outstanding."""
-    ticker_obj = yf.Ticker(ticker)
+    bundle = fetch_bundle(ticker)
     try:
         # Use income statement and balance sheet to find latest values
         # Note: This is a simplified fetch, and a real app might need more robust error handling
-        fcf = ticker_obj.cash_flow.loc['Free Cash Flow'].iloc[0]
-        shares = ticker_obj.get_shares_full().iloc[-1]
+        fcf = bundle['cash_flow'].loc['Free Cash Flow'].iloc[0]
+        shares = bundle['shares'].iloc[-1]
         return fcf, shares
     except Exception:
         st.error("Could not fetch FCF or Shares Outstanding. Using placeholder data.")
         return 100_000, 16_000_000 # Return large placeholder values
 
-@st.cache_data
 def calculate_dcf(fcf_growth, wacc, terminal_growth, base_fcf, years, shares_outstanding):
     """
     Simplified DCF model:
@@ -281,23 +463,424 @@ def calculate_dcf(fcf_growth, wacc, terminal_growth, base_fcf, years, shares_out
     - terminal_growth: long-term growth rate after forecast
     - base_fcf: starting free cash flow
     - shares_outstanding: number of shares
+
+    fcf_growth, wacc and terminal_growth may also be arrays of the same
+    shape, so several scenarios are valued elementwise in one call.
     """
-    # Project future FCFs
-    fcfs = [base_fcf * ((1 + fcf_growth) ** t) for t in range(1, years + 1)]
+    fcf_growth = np.asarray(fcf_growth, dtype=float)[..., np.newaxis]
+    wacc = np.asarray(wacc, dtype=float)[..., np.newaxis]
+    terminal_growth = np.asarray(terminal_growth, dtype=float)
+    t = np.arange(1, years + 1)
+
+    # Project future FCFs and their discount factors
+    fcfs = base_fcf * (1 + fcf_growth) ** t
+    discount_factors = (1 + wacc) ** t
 
     # Discount each FCF to present value
-    discounted_fcfs = [fcf / ((1 + wacc) ** t) for t, fcf in enumerate(fcfs, start=1)]
+    discounted_fcfs = (fcfs / discount_factors).sum(axis=-1)
 
     # Terminal value
-    terminal_value = fcfs[-1] * (1 + terminal_growth) / (wacc - terminal_growth)
-    discounted_terminal = terminal_value / ((1 + wacc) ** years)
+    terminal_value = fcfs[..., -1] * (1 + terminal_growth) / (wacc[..., 0] - terminal_growth)
+    discounted_terminal = terminal_value / discount_factors[..., -1]
 
     # Enterprise value
-    total_value = sum(discounted_fcfs) + discounted_terminal
+    total_value = discounted_fcfs + discounted_terminal
 
     # Per-share value
     intrinsic_value = total_value / shares_outstanding
-    return intrinsic_value
+    return intrinsic_value.item() if intrinsic_value.ndim == 0 else intrinsic_value
+
+# Hardcoded peer comparison data, including ROIC
+_PEER_COMPARISON = {
+    'Ticker': ['AAPL', 'MSFT', 'GOOG', 'NVDA'],
+    'P/E Ratio': [38.89, 37.3, 24.95, 51.74],
+    'P/B Ratio': [58.2, 11.06, 7.91, 44.63],
+    'ROE': [154.9, 32.4, 34.3, 105.2],
+    'ROIC': [31.2, 25.5, 21.8, 34.1],
+    'Reason for Comparison': [
+        "Primary subject of analysis.",
+        "A direct competitor in software and enterprise solutions with a strong cloud and AI focus.",
+        "A dominant player in digital advertising and a key competitor in AI and cloud computing.",
+        "A high-growth leader in the semiconductor industry, crucial for AI advancements."
+    ]
+}
+
+@st.cache_data
+def build_compare_df():
+    """Builds the peer comparison table."""
+    return pd.DataFrame(_PEER_COMPARISON)
+
+# Plotly's default qualitative palette, one colour per peer
+_PEER_COLORS = ['#636EFA', '#EF553B', '#00CC96', '#AB63FA', '#FFA15A', '#19D3F3']
+
+def _peer_bar_chart(compare_df, metric, title, axis_label):
+    """Builds a bar chart comparing one metric across the peers."""
+    fig = go.Figure(go.Bar(
+        x=compare_df['Ticker'],
+        y=compare_df[metric],
+        marker_color=_PEER_COLORS[:len(compare_df)],
+        hovertemplate=f"Ticker=%{{x}}<br>{axis_label}=%{{y}}<extra></extra>"
+    ))
+    fig.update_layout(
+        title=title,
+        xaxis_title='Ticker',
+        yaxis_title=axis_label,
+        showlegend=False
+    )
+    return fig
+
+@st.cache_resource
+def build_peer_figures():
+    """
+    Builds the P/E and ROIC peer comparison charts. Reruns share the cached
+    figures, so callers must not modify them.
+    """
+    compare_df = build_compare_df()
+    return (
+        _peer_bar_chart(compare_df, 'P/E Ratio', 'P/E Ratio Comparison', 'P/E Ratio'),
+        _peer_bar_chart(compare_df, 'ROIC', 'ROIC Comparison', 'ROIC (%)'),
+    )
+
+# Example DCF scenarios shown before the interactive sliders
+SCENARIO_PARAMETERS = {
+    "Conservative": {"fcf_growth": 0.05, "wacc": 0.095, "terminal_growth": 0.02},
+    "Base": {"fcf_growth": 0.10, "wacc": 0.085, "terminal_growth": 0.025},
+    "Aggressive": {"fcf_growth": 0.18, "wacc": 0.075, "terminal_growth": 0.03},
+}
+
+# The scenario table's input columns never change, so they are formatted once
+_SCENARIO_TABLE_STATIC = {
+    "Valuation Case": list(SCENARIO_PARAMETERS),
+    "FCF Growth (5Y)": [f"{p['fcf_growth']:.0%}" for p in SCENARIO_PARAMETERS.values()],
+    "WACC": [f"{p['wacc']:.1%}" for p in SCENARIO_PARAMETERS.values()],
+    "Terminal Growth Rate": [f"{p['terminal_growth']:.1%}" for p in SCENARIO_PARAMETERS.values()],
+}
+
+@st.cache_data
+def build_valuation_df(base_fcf, shares_outstanding):
+    """
+    Builds the DCF scenario table, valuing every scenario in one vectorized
+    call. The table comes back indexed by case, ready to display.
+    """
+    scenarios = SCENARIO_PARAMETERS.values()
+    intrinsic_values = calculate_dcf(
+        fcf_growth=np.array([p["fcf_growth"] for p in scenarios]),
+        wacc=np.array([p["wacc"] for p in scenarios]),
+        terminal_growth=np.array([p["terminal_growth"] for p in scenarios]),
+        base_fcf=base_fcf,
+        years=10,
+        shares_outstanding=shares_outstanding,
+    )
+
+    return pd.DataFrame({
+        **_SCENARIO_TABLE_STATIC,
+        "Intrinsic Value ($)": [f"{v:.2f}" for v in intrinsic_values],
+    }).set_index("Valuation Case")
+
+@st.cache_resource(ttl=STATEMENT_TTL)
+def build_financial_figures(ticker):
+    """
+    Builds the historical revenue/FCF and ROE/debt charts for a ticker, or
+    returns None if its financials are unavailable. Reruns share the cached
+    figures, so callers must not modify them.
+    """
+    financials = get_historical_financials(ticker)
+    if not financials:
+        return None
+
+    # Create a combined dataframe for charting. The series arrive sorted by
+    # date, and aligning them keeps that order, so no sort is needed here.
+    financials_df = pd.DataFrame({
+        'Revenue': financials['revenue'],
+        'Net Income': financials['net_income'],
+        'Free Cash Flow': financials['fcf'],
+        'ROE (%)': financials['roe'] * 100,
+        'Debt-to-Equity': financials['debt_to_equity']
+    })
+
+    # Combined Chart: Revenue, Net Income, and Free Cash Flow
+    fig_inc_fcf = go.Figure()
+
+    # Revenue as a bar chart (light color)
+    fig_inc_fcf.add_trace(go.Bar(
+        x=financials_df.index, 
+        y=financials_df['Revenue'], 
+        name='Revenue', 
+        marker_color='#4E84C4',
+        opacity=0.6,
+    ))
+
+    # Net Income as a bar chart (darker color)
+    fig_inc_fcf.add_trace(go.Bar(
+        x=financials_df.index, 
+        y=financials_df['Net Income'], 
+        name='Net Income', 
+        marker_color='#FFC34D',
+        opacity=0.8,
+    ))
+
+    # FCF as a line chart with a different y-axis
+    fig_inc_fcf.add_trace(go.Scatter(
+        x=financials_df.index, 
+        y=financials_df['Free Cash Flow'], 
+        mode='lines+markers', 
+        name='Free Cash Flow', 
+        line=dict(color='#047857', width=3), 
+        yaxis='y2'
+    ))
+
+    fig_inc_fcf.update_layout(
+        title=f'Revenue, Net Income, and FCF Trend for {ticker.upper()}',
+        barmode='group',
+        xaxis_title='Year',
+        yaxis_title='Amount ($)',
+        yaxis2=dict(
+            title='Free Cash Flow ($)',
+            overlaying='y',
+            side='right',
+            showgrid=False
+        ),
+        legend_title_text='Metric',
+        height=550
+    )
+
+    # Chart: ROE & Debt-to-Equity
+    fig_roe = go.Figure()
+
+    # ROE as a line chart
+    fig_roe.add_trace(go.Scatter(
+        x=financials_df.index,
+        y=financials_df['ROE (%)'],
+        mode='lines+markers',
+        name='ROE (%)',
+        line=dict(color='#B91C1C', width=3)
+    ))
+
+    # Debt-to-Equity as a bar chart (on a different axis)
+    fig_roe.add_trace(go.Bar(
+        x=financials_df.index,
+        y=financials_df['Debt-to-Equity'],
+        name='Debt-to-Equity',
+        marker_color='#5A5A5A',
+        opacity=0.5,
+        yaxis='y2'
+    ))
+
+    fig_roe.update_layout(
+        title=f'Profitability & Financial Health for {ticker.upper()}',
+        xaxis_title='Year',
+        yaxis_title='ROE (%)',
+        yaxis2=dict(
+            title='Debt-to-Equity',
+            overlaying='y',
+            side='right',
+            showgrid=False
+        ),
+        legend_title_text='Metric',
+        height=550
+    )
+    return fig_inc_fcf, fig_roe
+
+@st.cache_resource
+def build_importance_figure():
+    """
+    Builds the feature importance chart. Reruns share the cached figure, so
+    callers must not modify it.
+    """
+    importance_df = generate_feature_importance_data()
+
+    fig_importance = go.Figure(go.Bar(
+        x=importance_df['Importance'],
+        y=importance_df['Feature'],
+        orientation='h',
+        marker_color='#2563eb',
+        hovertemplate="Relative Influence (%)=%{x}<br>Valuation Factor=%{y}<extra></extra>"
+    ))
+    fig_importance.update_layout(
+        title="Top Drivers of the AI Valuation Decision",
+        xaxis_title='Relative Influence (%)',
+        yaxis_title='Valuation Factor',
+        title_x=0.05,
+        font=dict(size=12),
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        yaxis={'categoryorder': 'total ascending'}
+    )
+    return fig_importance
+
+def build_valuation_figure():
+    """Builds the intrinsic value vs current price chart, without values yet."""
+    fig = go.Figure()
+    fig.add_trace(go.Bar(
+        x=["Intrinsic Value"],
+        name="Intrinsic Value ($)",
+        marker_color="#4CAF50",
+        textposition="auto"
+    ))
+    fig.add_trace(go.Bar(
+        x=["Current Price"],
+        name="Current Price ($)",
+        marker_color="#FF6B6B",
+        textposition="auto"
+    ))
+
+    # Text annotation for Margin of Safety
+    fig.add_annotation(
+        x=0.5,  # Centered horizontally
+        y=1.1,  # Positioned at a higher point on the chart, above the title
+        xref="paper",
+        yref="paper",
+        showarrow=False,
+        font=dict(size=16)
+    )
+
+    fig.update_layout(
+        title="Intrinsic Value vs Current Market Price",
+        yaxis_title="Price ($)",
+        barmode="group",
+        height=350,
+        showlegend=False
+    )
+    return fig
+
+def update_valuation_figure(intrinsic_value, current_price, mos_percent, mos_color):
+    """
+    Writes the latest values into this session's valuation chart. The figure
+    is built once per session; slider moves only update its values.
+    """
+    if "valuation_fig" not in st.session_state:
+        st.session_state.valuation_fig = build_valuation_figure()
+
+    fig = st.session_state.valuation_fig
+    with fig.batch_update():
+        fig.data[0].update(y=[intrinsic_value], text=[f"${intrinsic_value:.2f}"])
+        fig.data[1].update(y=[current_price], text=[f"${current_price:.2f}"])
+        fig.layout.annotations[0].update(text=f"Margin of Safety: {mos_percent:.1f}%", font_color=mos_color)
+    return fig
+
+@st.fragment
+def dcf_playground(base_fcf, shares_outstanding, current_price):
+    """
+    Renders the DCF sliders and their live valuation. Moving a slider reruns
+    only this fragment, not the rest of the page.
+    """
+    # --- User Inputs (Sliders) ---
+    col_fcf, col_wacc, col_term = st.columns(3)
+
+    with col_fcf:
+        st.markdown("#### FCF Growth Rate")
+        st.markdown("*Think of it as the engine power of the business. Higher = faster-growing cash flow*")
+        fcf_growth_pct = st.slider("Projected FCF Growth (5–10 years)", 5, 30, 10, step=1, format="%d%%", label_visibility="collapsed")
+        fcf_growth = fcf_growth_pct / 100  # convert to decimal for calculations
+        st.caption("Typically 5–15% for mature firms, 15–25%+ for fast growers.")
+
+    with col_wacc:
+        st.markdown("#### Discount Rate (WACC)")
+        st.markdown("*Think of this as your ‘risk hurdle.’ Higher WACC = higher required return.*")
+        wacc_pct = st.slider("Discount Rate (WACC)", 5.0, 20.0, 8.5, step=0.5, format="%.1f%%", label_visibility="collapsed")
+        wacc = wacc_pct / 100
+        st.caption("Usually 7–9% for stable firms, 9–12% for risky ones.")
+
+    with col_term:
+        st.markdown("#### Terminal Growth Rate")
+        st.markdown("*The company’s long-term steady growth after 10 years.*")
+        terminal_growth_pct = st.slider("Terminal Growth Rate (%)", 2.0, 4.0, 2.5, step=0.1, format="%.1f%%", label_visibility="collapsed")
+        terminal_growth = terminal_growth_pct / 100
+        st.caption("Typically near inflation (~2–3%).")
+
+    # --- Live DCF Calculation ---
+    # Calculate intrinsic value using fetched data and user inputs
+    intrinsic_value = calculate_dcf(fcf_growth, wacc, terminal_growth, base_fcf, 10, shares_outstanding)
+
+    st.success(f"💰 **Estimated Intrinsic Value:** ${intrinsic_value:.2f} per share")
+
+    st.markdown("""
+    Use this as a **guide**, not an exact prediction.  
+    The real insight comes from understanding how **each assumption** changes the valuation.
+    """)
+
+    # Calculate Margin of Safety and determine color
+    if intrinsic_value > 0:
+        mos_percent = ((intrinsic_value - current_price) / intrinsic_value) * 100
+    else:
+        mos_percent = 0
+
+    mos_color = "green" if mos_percent > 0 else "red"
+
+    # --- Interactive Plotly Chart ---
+    fig = update_valuation_figure(intrinsic_value, current_price, mos_percent, mos_color)
+    st.plotly_chart(fig, use_container_width=True)
+
+    st.info(f"""
+    At your chosen assumptions:
+    - **FCF Growth:** {fcf_growth*100:.1f}%
+    - **WACC:** {wacc*100:.1f}%
+    - **Terminal Growth:** {terminal_growth*100:.1f}%
+
+    👉 The intrinsic value changes dynamically — move the sliders to explore best and worst cases.
+    """)
+
+# Canned co-pilot replies, checked in order; the first matching pattern wins
+_CHAT_RULES = [
+    (re.compile(r"buy|how much", re.IGNORECASE), "Based on our analysis, the current margin of safety of 15.65% is strong enough to justify a buy signal. We recommend a phased approach to take advantage of any short-term volatility."),
+    (re.compile(r"risk", re.IGNORECASE), "The primary risks for this stock are a slightly elevated P/E ratio and general market volatility. However, its strong business moat and consistent earnings growth help mitigate these risks."),
+]
+_DEFAULT_CHAT_RESPONSE = "That is a great question. The AI model is currently processing your request and will update the dashboard and chat with the latest insights. [Placeholder for a real AI response]."
+
+def get_chat_response(prompt):
+    """Returns the co-pilot's reply to a chat message."""
+    for pattern, response in _CHAT_RULES:
+        if pattern.search(prompt):
+            return response
+    return _DEFAULT_CHAT_RESPONSE
+
+def stream_chat_response(prompt):
+    """
+    Yields the co-pilot's reply word by word for st.write_stream. A model
+    backend's streaming iterator can take its place unchanged.
+    """
+    yield from re.split(r"(?<= )", get_chat_response(prompt))
+
+# First message of every chat. Messages are never edited once sent, so
+# sessions can share this one.
+_WELCOME_MESSAGE = {"role": "assistant", "content": "Hello! I am your AI Stock Insight Co-Pilot. What stock would you like to analyze today?"}
+
+# Number of chat messages shown before earlier ones are tucked away
+RECENT_MESSAGES = 50
+
+def render_message(message):
+    """Renders one chat message."""
+    with st.chat_message(message["role"]):
+        st.markdown(message["content"])
+
+@st.fragment
+def chat_panel():
+    """
+    Renders the co-pilot chat. Sending a message reruns only this fragment,
+    not the analysis above it.
+    """
+    # --- CHAT HISTORY ---
+    messages = st.session_state.setdefault("messages", [_WELCOME_MESSAGE])
+
+    # Earlier messages only build their elements when asked for
+    if len(messages) > RECENT_MESSAGES and st.toggle("Show earlier conversation", key="show_earlier_messages"):
+        for message in messages[:-RECENT_MESSAGES]:
+            render_message(message)
+
+    for message in messages[-RECENT_MESSAGES:]:
+        render_message(message)
+
+    # --- CHAT INPUT ---
+    # New messages are drawn in place on this run; the history loop picks
+    # them up from the next run on, so no extra rerun is needed
+    if prompt := st.chat_input("Ask about the stock..."):
+        user_message = {"role": "user", "content": prompt}
+        messages.append(user_message)
+        render_message(user_message)
+
+        with st.chat_message("assistant"):
+            response = st.write_stream(stream_chat_response(prompt))
+            messages.append({"role": "assistant", "content": response})
 
 # --- PAGE TITLE & INPUT ---
 st.title("IntrinsicAlpha AI")
@@ -315,219 +898,84 @@ ticker = st.text_input(
 if not ticker:
     st.info("Enter a stock ticker above to begin your analysis.")
 else:
+    # Charting and market-data libraries are only needed once there is a
+    # ticker, so the empty page renders without importing them.
+    import plotly.graph_objects as go
+    import yfinance as yf
+
     with st.spinner(f"Analyzing {ticker.upper()}..."):
-        stock_data = get_stock_data(ticker, '1y')
+        # The fundamentals download in the background while the price history
+        # is fetched, rather than waiting for it to finish first
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            bundle_future = executor.submit(fetch_bundle, ticker)
+            stock_data = get_stock_data(ticker, 'MAX')
+            bundle_future.result()
         metrics_data = get_key_metrics(ticker)
         hist_metrics = get_historical_metrics(ticker)
         
     if stock_data.empty or not metrics_data:
         st.error(f"Could not find data for ticker: {ticker.upper()}. Please try another one.")
     else:
+        # Fetched once here and reused by every section below
+        base_fcf, shares_outstanding = get_dcf_base_data(ticker)
+        current_price = metrics_data.get('Previous Close', 0)
+        detailed_insights = get_detailed_qualitative_insights(ticker)
+
         # --- HEADER ROW: Ticker + Timeframe ---
         col1, col2 = st.columns([0.45, 0.55])
         with col1:
-            st.markdown(
+            st.html(
                 f"""
                 <div style='line-height: 1; margin-bottom: -8px;'>
                     <h1 style='font-size: 3.4em; font-weight: 700; margin-bottom: 0;'>{ticker.upper()}</h1>
                 </div>
-                """,
-                unsafe_allow_html=True
+                """
             )
         with col2:
-            st.markdown(
+            st.html(
                 """
                 <div style='font-weight: 500; margin-top: 25px; margin-bottom: -8px;'>
                     Select Timeframe
                 </div>
-                """,
-                unsafe_allow_html=True
-            )
-            # Compact radio buttons
-            st.markdown(
                 """
-                <style>
-                    div[data-testid="stRadio"] label {
-                        padding-top: 0px !important;
-                        padding-bottom: 0px !important;
-                        margin-top: -35px !important;
-                    }
-                </style>
-                """,
-                unsafe_allow_html=True
             )
             timeframe = st.radio(
                 "",
-                ('1D', '5D', '1M', '6M', 'YTD', '1Y', '5Y', 'MAX'),
+                TIMEFRAMES,
                 horizontal=True,
                 key="timeframe_radio"
             )
 
-        # --- PRICE DATA ---
-        stock_data_tf = get_stock_data(ticker, timeframe)
-        if not stock_data_tf.empty:
-            start_price = stock_data_tf['Close'].iloc[0]
-            end_price = stock_data_tf['Close'].iloc[-1]
-            price_change = end_price - start_price
-            percent_change = (price_change / start_price) * 100
-        else:
-            price_change = 0
-            percent_change = 0
-
-        color = "#00b050" if price_change >= 0 else "#ff4d4d"
-        arrow = "▲" if price_change >= 0 else "▼"
-
-        # --- PRICE BLOCK ---
-        st.markdown(f"""
-        <div style="margin-top: -35px; line-height: 1;">
-            <span style="font-size: 2.6em; font-weight: 700;">{end_price:.2f}</span>
-            <span style="font-size: 0.7em; color: gray;">USD</span>
-        </div>
-        <div style="color: {color}; font-size: 1.1em; font-weight: 500; margin-top: -5px;">
-            {price_change:+.2f} ({percent_change:+.2f}%) <span>{arrow}</span>
-        </div>
-        """, unsafe_allow_html=True)
-
-        # --- CHART ---
-        fig = go.Figure(data=go.Scatter(
-            x=stock_data_tf.index,
-            y=stock_data_tf['Close'],
-            mode='lines',
-            line=dict(color=color),
-            hovertemplate=(
-                "<b>Date:</b> %{x|%Y-%m-%d %H:%M}<br>" +
-                "<b>Close:</b> %{y:.2f}<br>" +
-                "<b>Open:</b> %{customdata[0]:.2f}<br>" +
-                "<b>High:</b> %{customdata[1]:.2f}<br>" +
-                "<b>Low:</b> %{customdata[2]:.2f}<br>" +
-                "<b>Volume:</b> %{customdata[3]:,}<extra></extra>"
-            ),
-            customdata=np.stack((
-                stock_data_tf['Open'], 
-                stock_data_tf['High'], 
-                stock_data_tf['Low'], 
-                stock_data_tf['Volume']
-            ), axis=-1)
-        ))
-
-        fig.update_layout(
-            height=400,
-            margin=dict(t=10, b=10, l=10, r=10),
-            xaxis_title='',
-            yaxis_title='Stock Price',
-            xaxis_rangeslider_visible=False
-        )
-
-        st.plotly_chart(fig, use_container_width=True)
+        # --- PRICE BLOCK & CHART ---
+        end_price, price_change, percent_change = get_price_change(ticker, timeframe)
+        st.metric(label="Price (USD)", value=f"{end_price:.2f}", delta=f"{price_change:+.2f} ({percent_change:+.2f}%)")
+        st.plotly_chart(build_price_figure(ticker, timeframe), use_container_width=True)
 
         st.markdown("---")
 
         # --- BUSINESS HEALTH & KEY METRICS ---
         st.subheader("📊 Business Health & Key Metrics")
 
-        # Custom CSS for smaller font size in metrics
-        st.markdown("""
-        <style>
-            /* Target the entire metric container */
-            div[data-testid="stMetric"] {
-                padding: 0.5rem; /* Reduce padding for a tighter layout */
-            }
-
-            /* Target the metric label (e.g., "Day's Range") */
-            div[data-testid="stMetricLabel"] p {
-                font-size: 0.9rem !important; /* Smaller label font */
-            }
-
-            /* Target the metric value (the number) */
-            div[data-testid="stMetricValue"] {
-                font-size: 1.5rem !important; /* Smaller number font to prevent truncation */
-            }
-        </style>
-        """, unsafe_allow_html=True)
-        
-        # Create a single list of all metrics to distribute
-        all_metrics = [
-            {"label": "Previous Close", "value": metrics_data.get('Previous Close'), "help": "The closing price of the stock on the previous trading day.", "format": ".2f"},
-            {"label": "Open", "value": metrics_data.get('Open'), "help": "The price at which the stock began trading at the start of the current trading day.", "format": ".2f"},
-            {"label": "Day's Range", "value": metrics_data.get("Day's Range"), "help": "The range between the highest and lowest prices at which a stock has traded during the current day."},
-            {"label": "Volume", "value": metrics_data.get('Volume'), "help": "The total number of shares of a security that have been traded during a given period. High volume can indicate strong investor interest.", "format_func": format_large_number},
-            {"label": "Market Cap", "value": metrics_data.get('Market Cap'), "help": "The total value of a company’s outstanding shares. Used to determine a company's size and compare it to others.", "format_func": format_large_number},
-            {"label": "P/B Ratio", "value": metrics_data.get('P/B Ratio'), "help": "The P/B (Price-to-Book) ratio compares a stock's price to the company's net asset value. For a value investor, a P/B ratio under 1 is a traditional signal of an undervalued stock. Apple's P/B of ~58 is exceptionally high, reflecting strong market confidence in its intangible assets like brand and ecosystem, rather than its book value. This is significantly above its own 5-year average of ~29 and the technology industry average of ~13. This indicates the market is placing a very high value on the company's intangible assets, like its brand and ecosystem, rather than its tangible balance sheet. This is a crucial distinction from traditional value investing.", "format": ".2f"},
-            {"label": "Debt-to-Equity Ratio", "value": metrics_data.get('Debt-to-Equity Ratio'), "help": "This ratio indicates a company's financial leverage. A low ratio (under 1.5) is a sign of a financially strong company, which is crucial for stability. Apple's ratio of ~154 is high, suggesting a significant amount of debt, which should be considered when assessing risk.", "format": ".2f"},
-            {"label": "P/E Ratio (TTM)", "value": metrics_data.get('PE Ratio (TTM)'), "help": "The P/E Ratio (Price-to-Earnings) is a key valuation metric. For a defensive investor, Benjamin Graham suggested a P/E of less than 15. Apple's P/E of ~38.89 is significantly above this historical benchmark, suggesting the market expects substantial future growth. For an investor focused on a significant margin of safety, this metric is a warning sign that the stock may be overvalued.", "format": ".2f"},
-            {"label": "P/E Historical Avg (5Y)", "value": hist_metrics.get('Historical PE Avg (5Y)'), "help": "This compares the current P/E to its 5-year historical average (~29). A P/E of ~38.89 is significantly higher, indicating the stock is valued above its own recent history and suggests strong market optimism about future growth.", "format": ".2f"},
-            {"label": "EPS (TTM)", "value": metrics_data.get('EPS (TTM)'), "help": "Earnings Per Share (TTM) is the company's profit allocated to each outstanding share. Consistent EPS growth is a hallmark of a high-quality, predictable business. There is no single 'good' EPS number; it's a metric of a company's profitability. A large, stable EPS like Apple's (~$6.59) is a key factor in calculating a company's intrinsic value and is a sign of a strong business.", "format": ".2f"},
-            {"label": "Avg. Volume", "value": metrics_data.get('Avg. Volume'), "help": "The average daily trading volume over a specified period. High volume can indicate strong investor interest.", "format_func": format_large_number},
-            {"label": "Current ROA", "value": hist_metrics.get('Current ROA'), "help": "Return on Assets (ROA) measures how efficiently a company uses its assets to generate earnings. A good ROA depends on the industry, but generally, a number over 20% is considered excellent. Apple's ROA of ~22.1% is not only a testament to its operational efficiency but is also significantly higher than the technology industry average of ~12%, indicating a strong competitive advantage and high-quality business model. This is a key metric for a value investor assessing a company with a strong 'moat.'", "format": ".1f", "suffix": "%"},
-            {"label": "Historical ROA Avg (5Y)", "value": hist_metrics.get('Historical ROA Avg (5Y)'), "help": "Historical Return on Assets shows how a company's efficiency has changed over time. Apple's current ROA (~22.1%) is higher than its historical average (~18.5%), indicating that the company's capital efficiency has improved.", "format": ".1f", "suffix": "%"},
-            {"label": "Current Div Yield", "value": metrics_data.get('Current Dividend Yield'), "help": "The dividend yield shows the return on your investment from dividends alone. Apple’s current yield of ~0.41% is low compared to the S&P 500 average of around 1.5–2% and even slightly below the tech sector average of ~0.5–1%. This is typical for a growth-oriented company that reinvests its profits into innovation rather than paying large dividends.", "format": ".2f", "suffix": "%"},
-            {"label": "Historical Div Yield Avg (5Y)", "value": hist_metrics.get('Historical Dividend Yield Avg (5Y)'), "help": "The average dividend yield over the last 5 years is ~0.52%. Apple’s current yield of ~0.41% is slightly below this historical average, which mainly reflects its rising stock price rather than a shift in dividend policy. For a stable payer like Apple, changes in yield usually signal price movement, not a change in fundamentals.", "format": ".2f", "suffix": "%"}
-        ]
-
         # Create a 4-column layout for metrics and summary
         col1, col2, col3, col4 = st.columns([0.21, 0.21, 0.21, 0.37])
         
-        # Distribute the metrics evenly across the first three columns
-        metrics_per_col = len(all_metrics) // 3
-        
-        with col1:
-            for m in all_metrics[0:metrics_per_col]:
-                value_to_display = m.get('value')
-                if 'format_func' in m:
-                    value_to_display = m['format_func'](value_to_display)
-                elif m.get('format') and value_to_display is not None:
-                    value_to_display = f"{value_to_display:{m['format']}}"
-                else:
-                    value_to_display = str(value_to_display)
-
-                if 'suffix' in m and value_to_display != 'N/A':
-                    value_to_display += m['suffix']
-                
-                st.metric(label=m['label'], value=value_to_display, help=m['help'])
-
-        with col2:
-            for m in all_metrics[metrics_per_col:metrics_per_col*2]:
-                value_to_display = m.get('value')
-                if 'format_func' in m:
-                    value_to_display = m['format_func'](value_to_display)
-                elif m.get('format') and value_to_display is not None:
-                    value_to_display = f"{value_to_display:{m['format']}}"
-                else:
-                    value_to_display = str(value_to_display)
-
-                if 'suffix' in m and value_to_display != 'N/A':
-                    value_to_display += m['suffix']
-                
-                st.metric(label=m['label'], value=value_to_display, help=m['help'])
-
-        with col3:
-            for m in all_metrics[metrics_per_col*2:]:
-                value_to_display = m.get('value')
-                if 'format_func' in m:
-                    value_to_display = m['format_func'](value_to_display)
-                elif m.get('format') and value_to_display is not None:
-                    value_to_display = f"{value_to_display:{m['format']}}"
-                else:
-                    value_to_display = str(value_to_display)
-
-                if 'suffix' in m and value_to_display != 'N/A':
-                    value_to_display += m['suffix']
-                
-                st.metric(label=m['label'], value=value_to_display, help=m['help'])
+        # Format every metric in one pass, then distribute them evenly
+        # across the first three columns
+        metric_sources = {'metrics': metrics_data, 'hist': hist_metrics}
+        displays = [format_metric(m, metric_sources[m['source']].get(m['key'])) for m in KEY_METRIC_SPECS]
+
+        for col, group in zip((col1, col2, col3), _METRIC_GROUPS):
+            with col:
+                for i in group:
+                    m = KEY_METRIC_SPECS[i]
+                    st.metric(label=m['label'], value=displays[i], help=m['help'])
         
         with col4:
-            st.markdown(
-                """
-                <h3 style="margin-top: -50px; margin-bottom: 10px;">The Big Picture</h3>
-                """,
-                unsafe_allow_html=True
-            )
-            st.markdown(f"""
-            <div style="background-color: #f0f2f6; padding: 1.5rem; border-radius: 8px; height: 100%; margin-top: -10px;">
-                <p>Our analysis on Apple (AAPL) indicates a mixed picture. While it is a high-quality business with a strong competitive advantage (moat), its current valuation metrics—like a P/E ratio of {metrics_data.get('PE Ratio (TTM)', 'N/A'):.2f} and a P/B ratio of {metrics_data.get('P/B Ratio', 'N/A'):.2f}—are significantly higher than what a traditional value investor would look for. However, the company's strong historical performance and high ROA suggest a very efficient business. This means the market is placing a high value on future growth and brand, rather than just the balance sheet. For an investor focused on a significant margin of safety, this stock may not present a compelling opportunity at its current price.
-                </p>
-            </div>
-            """, unsafe_allow_html=True)
+            st.subheader("The Big Picture")
+            with st.container(border=True):
+                st.markdown(f"""
+                Our analysis on Apple (AAPL) indicates a mixed picture. While it is a high-quality business with a strong competitive advantage (moat), its current valuation metrics—like a P/E ratio of {metrics_data.get('PE Ratio (TTM)', 'N/A'):.2f} and a P/B ratio of {metrics_data.get('P/B Ratio', 'N/A'):.2f}—are significantly higher than what a traditional value investor would look for. However, the company's strong historical performance and high ROA suggest a very efficient business. This means the market is placing a high value on future growth and brand, rather than just the balance sheet. For an investor focused on a significant margin of safety, this stock may not present a compelling opportunity at its current price.
+                """)
             
         st.markdown("---")
 
@@ -537,104 +985,14 @@ else:
         A look at the company's financial trends is like a **business's medical chart**. It helps us confirm if the business is healthy and if its competitive advantage is holding up over time.
         """)
                 
-        financials = get_historical_financials(ticker)
+        financial_figures = build_financial_figures(ticker)
 
-        if financials:
-            # Create a combined dataframe for charting
-            financials_df = pd.DataFrame({
-                'Revenue': financials['revenue'],
-                'Net Income': financials['net_income'],
-                'Free Cash Flow': financials['fcf'],
-                'ROE': financials['roe']
-            }).sort_index()
+        if financial_figures:
+            fig_inc_fcf, fig_roe = financial_figures
 
             col_chart1, col_chart2 = st.columns(2)
-            
-            with col_chart1:
-                # Combined Chart: Revenue, Net Income, and Free Cash Flow
-                fig_inc_fcf = go.Figure()
-
-                # Revenue as a bar chart (light color)
-                fig_inc_fcf.add_trace(go.Bar(
-                    x=financials_df.index, 
-                    y=financials_df['Revenue'], 
-                    name='Revenue', 
-                    marker_color='#4E84C4',
-                    opacity=0.6,
-                ))
-
-                # Net Income as a bar chart (darker color)
-                fig_inc_fcf.add_trace(go.Bar(
-                    x=financials_df.index, 
-                    y=financials_df['Net Income'], 
-                    name='Net Income', 
-                    marker_color='#FFC34D',
-                    opacity=0.8,
-                ))
-
-                # FCF as a line chart with a different y-axis
-                fig_inc_fcf.add_trace(go.Scatter(
-                    x=financials_df.index, 
-                    y=financials_df['Free Cash Flow'], 
-                    mode='lines+markers', 
-                    name='Free Cash Flow', 
-                    line=dict(color='#047857', width=3), 
-                    yaxis='y2'
-                ))
-
-                fig_inc_fcf.update_layout(
-                    title=f'Revenue, Net Income, and FCF Trend for {ticker.upper()}',
-                    barmode='group',
-                    xaxis_title='Year',
-                    yaxis_title='Amount ($)',
-                    yaxis2=dict(
-                        title='Free Cash Flow ($)',
-                        overlaying='y',
-                        side='right',
-                        showgrid=False
-                    ),
-                    legend_title_text='Metric',
-                    height=550
-                )
-                st.plotly_chart(fig_inc_fcf, use_container_width=True)
-            
-            with col_chart2:
-                # Chart: ROE & Debt-to-Equity
-                fig_roe = go.Figure()
-
-                # ROE as a line chart
-                fig_roe.add_trace(go.Scatter(
-                    x=financials_df.index,
-                    y=financials_df['ROE'] * 100,
-                    mode='lines+markers',
-                    name='ROE (%)',
-                    line=dict(color='#B91C1C', width=3)
-                ))
-                
-                # Debt-to-Equity as a bar chart (on a different axis)
-                fig_roe.add_trace(go.Bar(
-                    x=financials_df.index,
-                    y=financials['debt_to_equity'],
-                    name='Debt-to-Equity',
-                    marker_color='#5A5A5A',
-                    opacity=0.5,
-                    yaxis='y2'
-                ))
-
-                fig_roe.update_layout(
-                    title=f'Profitability & Financial Health for {ticker.upper()}',
-                    xaxis_title='Year',
-                    yaxis_title='ROE (%)',
-                    yaxis2=dict(
-                        title='Debt-to-Equity',
-                        overlaying='y',
-                        side='right',
-                        showgrid=False
-                    ),
-                    legend_title_text='Metric',
-                    height=550
-                )
-                st.plotly_chart(fig_roe, use_container_width=True)
+            col_chart1.plotly_chart(fig_inc_fcf, use_container_width=True)
+            col_chart2.plotly_chart(fig_roe, use_container_width=True)
 
             st.markdown("---")
             st.markdown("#### 📖 Key Observations")
@@ -649,46 +1007,9 @@ else:
         st.markdown("We analyze the non-quantifiable strengths of the business, such as its competitive advantages and the quality of its leadership. These are the **bedrock of long-term value investing**.")
 
         qual_col1, qual_col2 = st.columns([0.45, 0.55])
-                
-        ratings = get_moat_and_management_rating(ticker)
-        key_metrics = get_key_metrics(ticker) # Fetching metrics again for ROIC
-
-        # Example of a new function to get more detailed moat and management info
-        def get_detailed_qualitative_insights(ticker):
-            if ticker.upper() == 'AAPL':
-                return {
-                    "moat": {
-                        "rating": "Very Wide Moat",
-                        "types": [
-                            {"name": "Network Effects", "icon": "🌐"},
-                            {"name": "High Switching Costs", "icon": "🔗"},
-                            {"name": "Intangible Assets (Brand)", "icon": "👑"}
-                        ],
-                        "explanation": "Powered by a deeply integrated ecosystem of hardware, software, and services. The **Network Effect** is at play as more users on the platform attract more developers and services. This creates **High Switching Costs**, as users are reluctant to leave the familiar ecosystem and abandon their app purchases, media library, and data. The **Intangible Asset** of its powerful brand allows it to command premium pricing."
-                    },
-                    "management": {
-                        "rating": "Exceptional",
-                        "explanation": "Management has a proven track record of efficient **capital allocation**, evidenced by consistent, disciplined share buybacks that have reduced the share count over time. Their focus on **innovation and margin control** has allowed the company to generate strong, predictable earnings and free cash flow."
-                    }
-                }
-            else:
-                # Placeholder for other tickers
-                return {
-                    "moat": {
-                        "rating": "No Moat",
-                        "types": [],
-                        "explanation": "Moat analysis is not available for this ticker yet. The AI is constantly learning and adding more detailed insights."
-                    },
-                    "management": {
-                        "rating": "N/A",
-                        "explanation": "Management analysis is not yet available for this ticker."
-                    }
-                }
 
         # --- LEFT COLUMN: MOAT & MANAGEMENT ---
         with qual_col1:
-            detailed_insights = get_detailed_qualitative_insights(ticker)
-
             st.markdown("#### The Moat: Competitive Advantage")
             st.info(
                 f"**Rating:** {detailed_insights['moat']['rating']} "
@@ -704,64 +1025,23 @@ else:
         with qual_col2:
             st.markdown("#### 🔄 Peers & Comparison")
             
-            # Hardcoded comparison data, including ROIC
-            compare_data = {
-                'Ticker': ['AAPL', 'MSFT', 'GOOG', 'NVDA'],
-                'P/E Ratio': [38.89, 37.3, 24.95, 51.74],
-                'P/B Ratio': [58.2, 11.06, 7.91, 44.63],
-                'ROE': [154.9, 32.4, 34.3, 105.2],
-                'ROIC': [31.2, 25.5, 21.8, 34.1]
-            }
-            
-            compare_df = pd.DataFrame(compare_data)
-
-            # Add the "Why" column logic
-            compare_df['Reason for Comparison'] = [
-                "Primary subject of analysis.",
-                "A direct competitor in software and enterprise solutions with a strong cloud and AI focus.",
-                "A dominant player in digital advertising and a key competitor in AI and cloud computing.",
-                "A high-growth leader in the semiconductor industry, crucial for AI advancements."
-            ]
+            compare_df = build_compare_df()
 
             st.markdown(f"""
             Our AI identifies peers with similar business models or valuation characteristics to **{ticker.upper()}**. 
             Comparing them helps us see if the market is valuing your stock fairly relative to its peers.
             """)
             
-            st.dataframe(compare_df, use_container_width=True, hide_index=True)
+            # A few static rows, so a plain table avoids the interactive grid
+            st.table(compare_df.set_index('Ticker'))
 
             # --- Consolidated Comparison Charts ---
             st.markdown("##### Visualizing Key Differences")
 
+            fig_pe, fig_roic = build_peer_figures()
             chart1, chart2 = st.columns(2)
-            
-            with chart1:
-                # P/E Ratio Comparison
-                fig_pe = px.bar(
-                    compare_df.melt(id_vars=['Ticker', 'Reason for Comparison'], value_vars=['P/E Ratio']),
-                    x='Ticker',
-                    y='value',
-                    title='P/E Ratio Comparison',
-                    labels={'value': 'P/E Ratio'},
-                    color='Ticker',
-                    color_discrete_sequence=px.colors.qualitative.Plotly
-                )
-                fig_pe.update_layout(showlegend=False) 
-                st.plotly_chart(fig_pe, use_container_width=True)
-
-            with chart2:
-                # ROIC Comparison
-                fig_roic = px.bar(
-                    compare_df.melt(id_vars=['Ticker', 'Reason for Comparison'], value_vars=['ROIC']),
-                    x='Ticker',
-                    y='value',
-                    title='ROIC Comparison',
-                    labels={'value': 'ROIC (%)'},
-                    color='Ticker',
-                    color_discrete_sequence=px.colors.qualitative.Plotly
-                )
-                fig_roic.update_layout(showlegend=False)
-                st.plotly_chart(fig_roic, use_container_width=True)
+            chart1.plotly_chart(fig_pe, use_container_width=True)
+            chart2.plotly_chart(fig_roic, use_container_width=True)
 
             st.info("The P/E Ratio reflects market expectations, while ROIC (Return on Invested Capital) measures how efficiently a company uses both debt and equity to generate profits. Comparing them reveals if a high price is justified by high capital efficiency.")
 
@@ -774,9 +1054,6 @@ else:
         The **Margin of Safety (MOS)** is the cornerstone of value investing, providing a crucial buffer against potential losses. It's the difference between a stock's estimated **intrinsic value** (its real worth) and its **market price**. A strong margin of safety is generally considered to be in the **20% to 30%** range.
         """)
 
-        # Get dynamic data for base case intrinsic value
-        base_fcf, shares_outstanding = get_dcf_base_data(ticker)
-        
         # Calculate the base case intrinsic value using dynamic data
         base_case_intrinsic_value = calculate_dcf(
             fcf_growth=0.10,
@@ -787,9 +1064,6 @@ else:
             shares_outstanding=shares_outstanding,
         )
 
-        # Get the current market price dynamically
-        current_price = metrics_data.get('Previous Close', 0)
-
         # Calculate the actual MOS
         if base_case_intrinsic_value > 0:
             actual_mos_percent = ((base_case_intrinsic_value - current_price) / base_case_intrinsic_value) * 100
@@ -799,41 +1073,24 @@ else:
         if actual_mos_percent > 15:
             verdict_text = "presents a strong"
             color = "green"
-            arrow = "▲"
         elif actual_mos_percent > 0:
             verdict_text = "offers a thin"
             color = "orange"
-            arrow = "↔"
         else:
             verdict_text = "offers no meaningful"
             color = "red"
-            arrow = "▼"
 
-        st.markdown(f"""
-        <div style="background-color: #f0f2f6; padding: 1.5rem; border-radius: 8px;">
-            <div style="display: flex; justify-content: space-between; align-items: center;">
-                <div>
-                    <p style="font-size: 1.1em; font-weight: 500; color: #555;">Current Price:</p>
-                    <p style="font-size: 2em; font-weight: 700; margin-top: -10px;">${current_price:.2f}</p>
-                </div>
-                <div>
-                    <p style="font-size: 1.1em; font-weight: 500; color: #555;">Base Case Intrinsic Value:</p>
-                    <p style="font-size: 2em; font-weight: 700; margin-top: -10px;">${base_case_intrinsic_value:.2f}</p>
-                </div>
-                <div>
-                    <p style="font-size: 1.1em; font-weight: 500; color: #555;">Calculated MOS:</p>
-                    <p style="font-size: 2em; font-weight: 700; margin-top: -10px; color: {color};">{actual_mos_percent:.1f}%</p>
-                </div>
-            </div>
-            <hr style="border: 1px solid #ddd; margin: 15px 0;">
-            <p style="font-size: 1.1em; font-weight: 500;">
-            Our analysis indicates the stock is currently trading at a 
-            <span style="color: {color};"><strong>
-            {abs(actual_mos_percent):.1f}% { 'discount' if actual_mos_percent > 0 else 'premium' }
-            </strong></span> relative to its estimated intrinsic value, and {verdict_text} margin of safety for a value investor.
-            </p>
-        </div>
-        """, unsafe_allow_html=True)
+        with st.container(border=True):
+            price_col, value_col, mos_col = st.columns(3)
+            price_col.metric("Current Price", f"${current_price:.2f}")
+            value_col.metric("Base Case Intrinsic Value", f"${base_case_intrinsic_value:.2f}")
+            mos_col.metric("Calculated MOS", f"{actual_mos_percent:.1f}%")
+            st.divider()
+            st.markdown(
+                f"Our analysis indicates the stock is currently trading at a "
+                f":{color}[**{abs(actual_mos_percent):.1f}% {'discount' if actual_mos_percent > 0 else 'premium'}**] "
+                f"relative to its estimated intrinsic value, and {verdict_text} margin of safety for a value investor."
+            )
 
         st.markdown("---")
 
@@ -904,39 +1161,8 @@ else:
         """)
 
         # --- Example Scenario Table ---
-        base_fcf, shares_outstanding = get_dcf_base_data(ticker)
-
-        # Define scenario parameters
-        scenario_parameters = {
-            "Conservative": {"fcf_growth": 0.05, "wacc": 0.095, "terminal_growth": 0.02},
-            "Base": {"fcf_growth": 0.10, "wacc": 0.085, "terminal_growth": 0.025},
-            "Aggressive": {"fcf_growth": 0.18, "wacc": 0.075, "terminal_growth": 0.03},
-        }
-
-        # Dynamically calculate intrinsic values for each scenario
-        intrinsic_values = []
-        for case, params in scenario_parameters.items():
-            value = calculate_dcf(
-                fcf_growth=params["fcf_growth"],
-                wacc=params["wacc"],
-                terminal_growth=params["terminal_growth"],
-                base_fcf=base_fcf,
-                years=10,
-                shares_outstanding=shares_outstanding,
-            )
-            intrinsic_values.append(value)
-
-        # Create the dataframe with dynamic values
-        valuation_data = {
-            "Valuation Case": list(scenario_parameters.keys()),
-            "FCF Growth (5Y)": [f"{p['fcf_growth']:.0%}" for p in scenario_parameters.values()],
-            "WACC": [f"{p['wacc']:.1%}" for p in scenario_parameters.values()],
-            "Terminal Growth Rate": [f"{p['terminal_growth']:.1%}" for p in scenario_parameters.values()],
-            "Intrinsic Value ($)": [f"{v:.2f}" for v in intrinsic_values],
-        }
-
-        valuation_df = pd.DataFrame(valuation_data)
-        st.dataframe(valuation_df, use_container_width=True, hide_index=True)
+        valuation_df = build_valuation_df(base_fcf, shares_outstanding)
+        st.table(valuation_df)
 
         st.markdown(dcf_explanation)
 
@@ -961,105 +1187,7 @@ else:
         Now, adjust the assumptions below — see how small changes in growth or risk completely shift the company’s intrinsic value.
         """)
 
-        # --- User Inputs (Sliders) ---
-        col_fcf, col_wacc, col_term = st.columns(3)
-
-        with col_fcf:
-            st.markdown("#### FCF Growth Rate")
-            st.markdown("*Think of it as the engine power of the business. Higher = faster-growing cash flow*")
-            fcf_growth_pct = st.slider("Projected FCF Growth (5–10 years)", 5, 30, 10, step=1, format="%d%%", label_visibility="collapsed")
-            fcf_growth = fcf_growth_pct / 100  # convert to decimal for calculations
-            st.caption("Typically 5–15% for mature firms, 15–25%+ for fast growers.")
-
-        with col_wacc:
-            st.markdown("#### Discount Rate (WACC)")
-            st.markdown("*Think of this as your ‘risk hurdle.’ Higher WACC = higher required return.*")
-            wacc_pct = st.slider("Discount Rate (WACC)", 5.0, 20.0, 8.5, step=0.5, format="%.1f%%", label_visibility="collapsed")
-            wacc = wacc_pct / 100
-            st.caption("Usually 7–9% for stable firms, 9–12% for risky ones.")
-
-        with col_term:
-            st.markdown("#### Terminal Growth Rate")
-            st.markdown("*The company’s long-term steady growth after 10 years.*")
-            terminal_growth_pct = st.slider("Terminal Growth Rate (%)", 2.0, 4.0, 2.5, step=0.1, format="%.1f%%", label_visibility="collapsed")
-            terminal_growth = terminal_growth_pct / 100
-            st.caption("Typically near inflation (~2–3%).")
-
-        # --- Live DCF Calculation ---
-        # Get dynamic data
-        base_fcf, shares_outstanding = get_dcf_base_data(ticker)
-        
-        # Calculate intrinsic value using fetched data and user inputs
-        intrinsic_value = calculate_dcf(fcf_growth, wacc, terminal_growth, base_fcf, 10, shares_outstanding)
-        
-        # Get the current market price dynamically
-        current_price = get_key_metrics(ticker).get('Previous Close', 0)
-
-        st.success(f"💰 **Estimated Intrinsic Value:** ${intrinsic_value:.2f} per share")
-
-        st.markdown("""
-        Use this as a **guide**, not an exact prediction.  
-        The real insight comes from understanding how **each assumption** changes the valuation.
-        """)
-
-        # --- Interactive Plotly Chart ---
-        fig = go.Figure()
-        fig.add_trace(go.Bar(
-            x=["Intrinsic Value"],
-            y=[intrinsic_value],
-            name="Intrinsic Value ($)",
-            marker_color="#4CAF50",
-            text=[f"${intrinsic_value:.2f}"],
-            textposition="auto"
-        ))
-        fig.add_trace(go.Bar(
-            x=["Current Price"],
-            y=[current_price],
-            name="Current Price ($)",
-            marker_color="#FF6B6B",
-            text=[f"${current_price:.2f}"],
-            textposition="auto"
-        ))
-        
-        # Calculate Margin of Safety and determine color
-        if intrinsic_value > 0:
-            mos_percent = ((intrinsic_value - current_price) / intrinsic_value) * 100
-        else:
-            mos_percent = 0
-            
-        mos_color = "green" if mos_percent > 0 else "red"
-        
-        # Add a text annotation for Margin of Safety
-        fig.add_annotation(
-            x=0.5,  # Centered horizontally
-            y=1.1,  # Positioned at a higher point on the chart, above the title
-            xref="paper",
-            yref="paper",
-            text=f"Margin of Safety: {mos_percent:.1f}%",
-            showarrow=False,
-            font=dict(
-                size=16,
-                color=mos_color
-            )
-        )
-        
-        fig.update_layout(
-            title="Intrinsic Value vs Current Market Price",
-            yaxis_title="Price ($)",
-            barmode="group",
-            height=350,
-            showlegend=False
-        )
-        st.plotly_chart(fig, use_container_width=True)
-
-        st.info(f"""
-        At your chosen assumptions:
-        - **FCF Growth:** {fcf_growth*100:.1f}%
-        - **WACC:** {wacc*100:.1f}%
-        - **Terminal Growth:** {terminal_growth*100:.1f}%
-
-        👉 The intrinsic value changes dynamically — move the sliders to explore best and worst cases.
-        """)
+        dcf_playground(base_fcf, shares_outstanding, current_price)
 
         st.markdown("""
         > *“Price is what you pay. Value is what you get.”*  
@@ -1091,24 +1219,7 @@ else:
 
         with exp_col1:
             st.markdown("#### 🔍 Feature Importance: What Drove the Decision")
-            importance_df = generate_feature_importance_data()
-
-            fig_importance = px.bar(
-                importance_df,
-                x='Importance',
-                y='Feature',
-                orientation='h',
-                title="Top Drivers of the AI Valuation Decision",
-                labels={'Importance': 'Relative Influence (%)', 'Feature': 'Valuation Factor'},
-                color_discrete_sequence=['#2563eb']
-            )
-            fig_importance.update_layout(
-                title_x=0.05,
-                font=dict(size=12),
-                plot_bgcolor='rgba(0,0,0,0)',
-                paper_bgcolor='rgba(0,0,0,0)',
-                yaxis={'categoryorder': 'total ascending'}
-            )
+            fig_importance = build_importance_figure()
             st.plotly_chart(fig_importance, use_container_width=True)
 
         with exp_col2:
@@ -1155,29 +1266,4 @@ else:
         st.header("💬 AI Co-Pilot")
         st.markdown("Ask me anything about this stock or the analysis above.")
 
-        # --- CHAT HISTORY ---
-        if "messages" not in st.session_state:
-            st.session_state.messages = []
-            st.session_state.messages.append({"role": "assistant", "content": "Hello! I am your AI Stock Insight Co-Pilot. What stock would you like to analyze today?"})
-
-        for message in st.session_state.messages:
-            with st.chat_message(message["role"]):
-                st.markdown(message["content"])
-
-        # --- CHAT INPUT ---
-        if prompt := st.chat_input("Ask about the stock..."):
-            st.session_state.messages.append({"role": "user", "content": prompt})
-            with st.chat_message("user"):
-                st.markdown(prompt)
-
-            with st.chat_message("assistant"):
-                with st.spinner("Analyzing..."):
-                    if "buy" in prompt.lower() or "how much" in prompt.lower():
-                        response = "Based on our analysis, the current margin of safety of 15.65% is strong enough to justify a buy signal. We recommend a phased approach to take advantage of any short-term volatility."
-                    elif "risks" in prompt.lower() or "risk" in prompt.lower():
-                        response = "The primary risks for this stock are a slightly elevated P/E ratio and general market volatility. However, its strong business moat and consistent earnings growth help mitigate these risks."
-                    else:
-                        response = "That is a great question. The AI model is currently processing your request and will update the dashboard and chat with the latest insights. [Placeholder for a real AI response]."
-
-                    st.markdown(response)
-                    st.session_state.messages.append({"role": "assistant", "content": response})
\ No newline at end of file
+        chat_panel()
\ No newline at end of file
@@ -0,0 +1,101 @@
+"""On-disk cache for yfinance responses, so repeat lookups survive restarts."""
+import functools
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+CACHE_DIR = Path(__file__).resolve().parent.parent / ".cache"
+
+# Returned by FileCache.get when there is no fresh entry
+MISS = object()
+
+
+class FileCache:
+    """
+    Stores payloads under .cache/{ticker}/{endpoint}_{md5(params)}.pkl along
+    with the time they were written and their TTL.
+    """
+
+    def __init__(self, root=CACHE_DIR):
+        self.root = Path(root)
+
+    def _path(self, ticker, endpoint, params):
+        digest = hashlib.md5(repr(params).encode()).hexdigest()
+        return self.root / ticker.upper() / f"{endpoint}_{digest}.pkl"
+
+    def get(self, ticker, endpoint, params=()):
+        """Returns the cached payload, or MISS if it is absent or stale."""
+        try:
+            with open(self._path(ticker, endpoint, params), "rb") as f:
+                entry = pickle.load(f)
+            expired = time.time() - entry["timestamp"] > entry["ttl"]
+        # A corrupt or outdated pickle can raise almost anything on load
+        except Exception:
+            return MISS
+        if expired:
+            return MISS
+        return entry["payload"]
+
+    def set(self, ticker, endpoint, payload, ttl, params=()):
+        """Writes a payload; IO errors are reported but never raised."""
+        path = self._path(ticker, endpoint, params)
+        entry = {"timestamp": time.time(), "ttl": ttl, "payload": payload}
+        tmp_path = None
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # A unique temp file per writer, so concurrent writers never share one
+            with tempfile.NamedTemporaryFile(dir=path.parent, suffix=".tmp", delete=False) as f:
+                tmp_path = f.name
+                pickle.dump(entry, f)
+            # Atomic swap, so concurrent readers never see a partial file
+            os.replace(tmp_path, path)
+        except (OSError, pickle.PicklingError) as e:
+            print(f"Could not write cache entry {path}. Error: {e}")
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+    def get_or_fetch(self, ticker, endpoint, fetch, ttl, params=()):
+        """Returns the cached payload, or calls fetch() and stores its result."""
+        payload = self.get(ticker, endpoint, params)
+        if payload is not MISS:
+            return payload
+        payload = fetch()
+        if _is_cacheable(payload):
+            self.set(ticker, endpoint, payload, ttl, params)
+        return payload
+
+
+default_cache = FileCache()
+
+
+def _is_cacheable(payload):
+    """Failed or partial fetches are not persisted, so they are retried next time."""
+    if payload is None:
+        return False
+    if isinstance(payload, (pd.DataFrame, pd.Series)):
+        return not payload.empty
+    if isinstance(payload, dict):
+        return all(value is not None for value in payload.values())
+    return True
+
+
+def file_cached(endpoint, ttl_seconds, cache=None):
+    """
+    Caches a fetcher's result on disk. The wrapped function must take the
+    ticker as its first argument; any further arguments are part of the key.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(ticker, *args):
+            store = cache or default_cache
+            return store.get_or_fetch(ticker, endpoint, lambda: func(ticker, *args), ttl_seconds, args)
+        return wrapper
+    return decorator
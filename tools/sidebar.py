@@ -0,0 +1,100 @@
+"""
+Chat history sidebar shared by the app's pages.
+
+Every page that shows the sidebar renders it through here, so the session
+list and its callbacks cannot drift apart between pages.
+"""
+import uuid
+from itertools import islice
+
+import streamlit as st
+
+# Number of chats listed in the sidebar before older ones are tucked away
+RECENT_SESSIONS = 20
+
+
+@st.cache_resource
+def demo_sessions():
+    """Dummy chats for demonstration. Their ids are generated once per process."""
+    return {
+        str(uuid.uuid4()): {"title": "Is GOOG a Growth Stock?"},
+        str(uuid.uuid4()): {"title": "PEG Ratio Explained"},
+        str(uuid.uuid4()): {"title": "Comparing KO and PEP"},
+        str(uuid.uuid4()): {"title": "MSFT Intrinsic Value Analysis"}
+    }
+
+
+def init_sessions():
+    """Sets up the chat session state on a session's first run."""
+    if "sessions" not in st.session_state:
+        st.session_state.sessions = {}
+    if "current_session_id" not in st.session_state:
+        st.session_state.current_session_id = None
+
+    # Pre-populate dummy sessions for demonstration. Each session gets its own
+    # copies, since chats are renamed in place.
+    if not st.session_state.sessions:
+        st.session_state.sessions = {session_id: dict(data) for session_id, data in demo_sessions().items()}
+        st.session_state.current_session_id = None
+
+
+def new_chat_session(clear_keys=()):
+    """Creates a new chat session and clears the given widget values."""
+    session_id = str(uuid.uuid4())
+    st.session_state.current_session_id = session_id
+    st.session_state.sessions[session_id] = {"title": "New Chat"}
+    for key in clear_keys:
+        st.session_state[key] = ""
+
+
+def load_session(session_id):
+    st.session_state.current_session_id = session_id
+
+
+def rename_session(session_id):
+    new_title = st.session_state[f"edit_{session_id}"]
+    if new_title:
+        st.session_state.sessions[session_id]["title"] = new_title
+
+
+def delete_session(session_id):
+    del st.session_state.sessions[session_id]
+    if st.session_state.current_session_id == session_id:
+        st.session_state.current_session_id = None
+
+
+def session_row(session_id, session_data):
+    """Renders one chat in the sidebar, with rename/delete behind a popover."""
+    is_active = (session_id == st.session_state.current_session_id)
+    label = f"**▶ {session_data['title']}**" if is_active else session_data['title']
+
+    col1, col2 = st.columns([0.8, 0.2])
+    col1.button(label, key=f"load_{session_id}", on_click=load_session, args=(session_id,), width="stretch")
+
+    with col2.popover("⋯", width="stretch"):
+        st.text_input("Rename", value=session_data["title"], key=f"edit_{session_id}", on_change=rename_session, args=(session_id,))
+        st.button("🗑️ Delete", key=f"delete_{session_id}", on_click=delete_session, args=(session_id,), width="stretch")
+
+
+def chat_history(clear_keys=()):
+    """
+    Renders the chat list into the current container, normally st.sidebar.
+    clear_keys names widgets whose values "New chat" resets.
+    """
+    init_sessions()
+
+    st.header("IntrinsicAlpha AI")
+    # Callbacks update the state before the rerun the click already triggers
+    st.button("New chat", on_click=new_chat_session, args=(clear_keys,), width="stretch")
+
+    st.markdown("---")
+    st.subheader("Recent")
+
+    sessions = st.session_state.sessions
+    for session_id in islice(reversed(sessions), RECENT_SESSIONS):
+        session_row(session_id, sessions[session_id])
+
+    # Older chats only build their widgets when asked for
+    if len(sessions) > RECENT_SESSIONS and st.toggle("Show older chats", key="show_older_chats"):
+        for session_id in islice(reversed(sessions), RECENT_SESSIONS, None):
+            session_row(session_id, sessions[session_id])
@@ -0,0 +1,43 @@
+"""
+App-wide guard around Yahoo Finance requests.
+
+Every Streamlit session runs in the same process, so a burst of users can
+otherwise open dozens of connections to Yahoo at once and get rate limited.
+"""
+import threading
+from concurrent.futures import Future
+
+# Most requests allowed in flight to Yahoo across all sessions
+MAX_CONCURRENT_REQUESTS = 8
+
+_request_slots = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+
+def throttled(key, fetch):
+    """
+    Runs fetch() under the app-wide concurrency limit. A caller asking for a
+    key that is already being fetched waits for that request instead of
+    sending its own.
+    """
+    with _in_flight_lock:
+        future = _in_flight.get(key)
+        is_owner = future is None
+        if is_owner:
+            future = _in_flight[key] = Future()
+
+    if not is_owner:
+        return future.result()
+
+    try:
+        with _request_slots:
+            result = fetch()
+        future.set_result(result)
+        return result
+    except BaseException as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with _in_flight_lock:
+            del _in_flight[key]